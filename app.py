@@ -1,9 +1,17 @@
 # Complete AgMCP Uganda Prototype
 import streamlit as st
 import requests
-import pandas as pd
-from datetime import datetime, timedelta
-import json
+from requests.adapters import HTTPAdapter
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from urllib.parse import urlencode
+import hashlib
+import operator
+import tempfile
+import time
+from openmeteo_sdk.WeatherApiResponse import WeatherApiResponse
 
 # Configuration
 st.set_page_config(
@@ -121,72 +129,177 @@ ALERT_RULES = [
     }
 ]
 
+def _build_rule_index(rules):
+    """Group alert rules by crop, district and active month for fast lookup"""
+    by_key = {}
+    all_districts = {}
+    for rule in rules:
+        # Pre-parse MM-DD windows into (month, day) tuples for integer comparison
+        rule['_start'] = tuple(map(int, rule['start_date'].split('-')))
+        rule['_end'] = tuple(map(int, rule['end_date'].split('-')))
+        rule['_cond_keys'] = frozenset(rule['weather_conditions'])
+        
+        # File the rule under every month its date window touches
+        for month in range(rule['_start'][0], rule['_end'][0] + 1):
+            if rule['district'] == 'all':
+                all_districts.setdefault((rule['crop'], month), []).append(rule)
+            else:
+                by_key.setdefault((rule['crop'], rule['district'], month), []).append(rule)
+    return by_key, all_districts
+
 # WEATHER FUNCTIONS
-@st.cache_data(ttl=3600)  # Cache for 1 hour
-def get_weather_forecast(lat, lon, days=7):
-    """Fetch weather forecast from Open-Meteo API"""
-    url = "https://api.open-meteo.com/v1/forecast"
+FORECAST_URL = "https://api.open-meteo.com/v1/forecast"
+FORECAST_TTL = 15 * 60  # Forecasts stay fresh for 15 minutes
+CACHE_DIR = Path.home() / '.cache' / 'agmcp'
+
+# Requested in this order; the flatbuffers response returns variables by position
+DAILY_VARIABLES = ('precipitation_sum', 'temperature_2m_max', 'temperature_2m_min', 'relative_humidity_2m_mean')
+
+# Shared session so repeat requests reuse the open connection
+SESSION = requests.Session()
+SESSION.headers.update({'Accept-Encoding': 'gzip'})
+SESSION.mount('https://', HTTPAdapter(pool_connections=4, pool_maxsize=8))
+
+def _forecast_url(lat, lon, days=7):
+    """Full Open-Meteo request URL for a location"""
     params = {
         'latitude': lat,
         'longitude': lon,
-        'daily': 'precipitation_sum,temperature_2m_max,temperature_2m_min,relative_humidity_2m_mean',
+        'daily': ','.join(DAILY_VARIABLES),
         'timezone': 'Africa/Nairobi',
-        'forecast_days': days
+        'forecast_days': days,
+        'format': 'flatbuffers'
     }
+    return FORECAST_URL + '?' + urlencode(params)
+
+# District locations are fixed, so their request URLs are built once
+for info in DISTRICTS.values():
+    info['forecast_url'] = _forecast_url(info['lat'], info['lon'])
+
+def _forecast_cache_path(url):
+    """Disk cache location for a forecast request"""
+    return CACHE_DIR / f"forecast_{hashlib.sha1(url.encode()).hexdigest()}.fb"
+
+def _read_cached_payload(path):
+    """Return cached response bytes if still fresh, else None"""
+    try:
+        if time.time() - path.stat().st_mtime < FORECAST_TTL:
+            return path.read_bytes()
+    except OSError:
+        pass
+    return None
+
+def _write_cached_payload(path, payload):
+    """Store response bytes on disk, ignoring cache write failures"""
+    try:
+        CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        # Unique temp file so prefetch and foreground writers never collide
+        tmp_file = tempfile.NamedTemporaryFile(dir=CACHE_DIR, suffix='.tmp', delete=False)
+        tmp_path = Path(tmp_file.name)
+        try:
+            with tmp_file:
+                tmp_file.write(payload)
+            tmp_path.replace(path)
+        except OSError:
+            tmp_path.unlink(missing_ok=True)
+            raise
+    except OSError:
+        pass
+
+def _clear_forecast_cache():
+    """Remove all forecasts stored on disk"""
+    for path in CACHE_DIR.glob('forecast_*.fb'):
+        path.unlink(missing_ok=True)
+
+def _fetch_forecast_payload(url):
+    """Fetch raw Open-Meteo flatbuffers, served from the disk cache when fresh"""
+    path = _forecast_cache_path(url)
+    payload = _read_cached_payload(path)
+    if payload is not None:
+        return payload
     
+    response = SESSION.get(url, timeout=10)
+    response.raise_for_status()
+    _write_cached_payload(path, response.content)
+    return response.content
+
+@st.cache_data(ttl=FORECAST_TTL)
+def get_weather_forecast(url):
+    """Fetch weather forecast from Open-Meteo API"""
     try:
-        response = requests.get(url, params=params, timeout=10)
-        response.raise_for_status()
-        data = response.json()
+        # Single-location payloads hold one message after a 4-byte length prefix
+        data = WeatherApiResponse.GetRootAs(_fetch_forecast_payload(url), 4)
+        daily = data.Daily()
+        offset = data.UtcOffsetSeconds()
+        rain, temp_max, temp_min, humidity = (
+            daily.Variables(i).ValuesAsNumpy().astype(float) for i in range(len(DAILY_VARIABLES))
+        )
         
-        forecast = []
-        daily = data['daily']
-        for i in range(len(daily['time'])):
-            forecast.append({
-                'date': daily['time'][i],
-                'rainfall_mm': daily['precipitation_sum'][i] or 0,
-                'temp_max': daily['temperature_2m_max'][i],
-                'temp_min': daily['temperature_2m_min'][i],
-                'humidity': daily['relative_humidity_2m_mean'][i] or 0
-            })
+        # Keep the forecast as columns so analysis can use array reductions
+        forecast = {
+            'date': [
+                datetime.fromtimestamp(t + offset, timezone.utc).strftime('%Y-%m-%d')
+                for t in range(daily.Time(), daily.TimeEnd(), daily.Interval())
+            ],
+            'rainfall_mm': np.nan_to_num(rain),
+            'temp_max': temp_max,
+            'temp_min': temp_min,
+            'humidity': np.nan_to_num(humidity)
+        }
         
         return forecast
     except Exception as e:
         st.error(f"Unable to fetch weather data: {str(e)}")
-        return []
+        return {}
+
+def prefetch_forecasts(districts):
+    """Warm the disk cache for the given districts in the background"""
+    if 'prefetch_pool' not in st.session_state:
+        st.session_state.prefetch_pool = ThreadPoolExecutor(max_workers=3)
+    
+    pool = st.session_state.prefetch_pool
+    for info in districts:
+        future = pool.submit(_fetch_forecast_payload, info['forecast_url'])
+        # Failures are ignored here; the foreground fetch reports them
+        future.add_done_callback(lambda f: f.exception())
 
 def analyze_weather_conditions(forecast):
     """Analyze weather for alert triggers"""
     if not forecast:
         return {}
     
+    rain = forecast['rainfall_mm']
     analysis = {
-        'next_24h_rain': forecast[0]['rainfall_mm'],
-        'next_72h_rain': sum(day['rainfall_mm'] for day in forecast[:3]),
-        'avg_humidity': sum(day['humidity'] for day in forecast[:3]) / 3,
-        'avg_temp': sum(day['temp_max'] for day in forecast[:3]) / 3,
-        'rainy_days_ahead': len([d for d in forecast[:7] if d['rainfall_mm'] > 1])
+        'next_24h_rain': float(rain[0]),
+        'next_72h_rain': float(rain[:3].sum()),
+        'avg_humidity': float(forecast['humidity'][:3].sum()) / 3,
+        'avg_temp': float(forecast['temp_max'][:3].sum()) / 3,
+        'rainy_days_ahead': int((rain[:7] > 1).sum()),
+        'total_rain_7d': float(rain.sum()),
+        'avg_temp_7d': float(forecast['temp_max'].mean()),
+        'rainy_days_7d': int((rain > 1).sum())
     }
     
     return analysis
 
 # ALERT ENGINE
-def check_alerts(district, crop, current_date, weather_analysis):
+def check_alerts(district, crop, current_date, weather_analysis, rule_index):
     """Check for active alerts based on crop calendar and weather"""
     active_alerts = []
-    current_date_str = current_date.strftime('%m-%d')
+    today = (current_date.month, current_date.day)
+    rules_by_key, rules_all_districts = rule_index
     
-    for rule in ALERT_RULES:
-        # Filter by district and crop
-        if rule['district'] != 'all' and rule['district'] != district.lower():
-            continue
-        if rule['crop'] != crop:
-            continue
-        
+    # Only rules for this crop and month in this district (or all districts) can match
+    candidates = (
+        rules_by_key.get((crop, district.lower(), current_date.month), [])
+        + rules_all_districts.get((crop, current_date.month), [])
+    )
+    
+    for rule in candidates:
         # Check date window
-        if rule['start_date'] <= current_date_str <= rule['end_date']:
+        if rule['_start'] <= today <= rule['_end']:
             # Check weather conditions
-            weather_triggered = check_weather_trigger(rule['weather_conditions'], weather_analysis)
+            weather_triggered = check_weather_trigger(rule['_cond_keys'], rule['weather_conditions'], weather_analysis)
             
             if weather_triggered:
                 active_alerts.append({
@@ -197,73 +310,89 @@ def check_alerts(district, crop, current_date, weather_analysis):
     
     return active_alerts
 
-def check_weather_trigger(conditions, analysis):
+# (condition key, analysis key, comparison, message) for each weather trigger
+TRIGGER_SPECS = [
+    ('rainfall_24h', 'next_24h_rain', operator.gt, "Heavy rain expected: {:.1f}mm in 24h"),
+    ('rainfall_72h', 'next_72h_rain', operator.gt, "Total rain forecast: {:.1f}mm in 3 days"),
+    ('humidity', 'avg_humidity', operator.gt, "High humidity: {:.0f}%"),
+    ('rainfall_forecast', 'rainy_days_ahead', lambda days, _: days >= 3, "Adequate rainfall expected")
+]
+TRIGGER_KEYS = frozenset(spec[0] for spec in TRIGGER_SPECS)
+
+def check_weather_trigger(cond_keys, conditions, analysis):
     """Check if weather conditions trigger an alert"""
-    triggers = []
-    
-    if 'rainfall_24h' in conditions and analysis.get('next_24h_rain', 0) > conditions['rainfall_24h']:
-        triggers.append(f"Heavy rain expected: {analysis['next_24h_rain']:.1f}mm in 24h")
-    
-    if 'rainfall_72h' in conditions and analysis.get('next_72h_rain', 0) > conditions['rainfall_72h']:
-        triggers.append(f"Total rain forecast: {analysis['next_72h_rain']:.1f}mm in 3 days")
-    
-    if 'humidity' in conditions and analysis.get('avg_humidity', 0) > conditions['humidity']:
-        triggers.append(f"High humidity: {analysis['avg_humidity']:.0f}%")
-    
-    if 'rainfall_forecast' in conditions and analysis.get('rainy_days_ahead', 0) >= 3:
-        triggers.append("Adequate rainfall expected")
+    # Rules without any weather condition we know how to evaluate never fire
+    if cond_keys.isdisjoint(TRIGGER_KEYS):
+        return []
     
-    return triggers
+    return [
+        message.format(analysis[analysis_key])
+        for condition_key, analysis_key, compare, message in TRIGGER_SPECS
+        if condition_key in cond_keys and compare(analysis.get(analysis_key, 0), conditions[condition_key])
+    ]
+
+SEVERITY_MAP = {
+    'critical': {'icon': '🔴', 'level': 'CRITICAL', 'color': 'red'},
+    'high': {'icon': '🟡', 'level': 'HIGH', 'color': 'orange'},
+    'medium': {'icon': '🟢', 'level': 'ADVISORY', 'color': 'green'},
+    'low': {'icon': '🔵', 'level': 'INFO', 'color': 'blue'}
+}
 
 def get_alert_severity(priority):
     """Map priority to display severity"""
-    severity_map = {
-        'critical': {'icon': '🔴', 'level': 'CRITICAL', 'color': 'red'},
-        'high': {'icon': '🟡', 'level': 'HIGH', 'color': 'orange'},
-        'medium': {'icon': '🟢', 'level': 'ADVISORY', 'color': 'green'},
-        'low': {'icon': '🔵', 'level': 'INFO', 'color': 'blue'}
-    }
-    return severity_map.get(priority, severity_map['low'])
+    return SEVERITY_MAP.get(priority, SEVERITY_MAP['low'])
 
 # CROP INFORMATION
-def get_crop_guidance(crop, district):
-    """Get general crop guidance"""
-    guidance = {
-        'maize': {
-            'season': 'Mar-Jul (Season 1), Aug-Dec (Season 2)',
-            'key_stages': 'Planting → Top-dress (4-6 weeks) → Harvest',
-            'critical_periods': 'Fertilizer application, Fall Armyworm scouting',
-            'tips': 'Plant at rain onset for nitrogen flush benefit'
-        },
-        'beans': {
-            'season': 'Mar-Jul (Season 1), Aug-Dec (Season 2)', 
-            'key_stages': 'Planting → Weeding (2,5 weeks) → Harvest',
-            'critical_periods': 'Early weeding, harvest timing',
-            'tips': 'Harvest before heavy rains to prevent pod rot'
-        },
-        'groundnuts': {
-            'season': 'Feb-Mar, Aug-Sep planting',
-            'key_stages': 'Planting → Earthing-up → Harvest (90-110 days)',
-            'critical_periods': 'Rain-onset planting, pegging stage',
-            'tips': 'Must plant early in season for proper pod filling'
-        },
-        'sorghum': {
-            'season': 'Mar-Aug (single season in north)',
-            'key_stages': 'Planting → Weeding → Bird scaring → Harvest',
-            'critical_periods': 'Early weeding, grain filling (bird damage)',
-            'tips': 'Very drought tolerant, good for marginal areas'
-        },
-        'irish_potato': {
-            'season': 'Mar-Jul, Sep-Jan (highlands)',
-            'key_stages': 'Planting → Earthing-up → Harvest',
-            'critical_periods': 'Cool weather establishment, blight control',
-            'tips': 'Harvest before heavy rains, store in cool dry place'
-        }
+CROP_GUIDANCE = {
+    'maize': {
+        'season': 'Mar-Jul (Season 1), Aug-Dec (Season 2)',
+        'key_stages': 'Planting → Top-dress (4-6 weeks) → Harvest',
+        'critical_periods': 'Fertilizer application, Fall Armyworm scouting',
+        'tips': 'Plant at rain onset for nitrogen flush benefit'
+    },
+    'beans': {
+        'season': 'Mar-Jul (Season 1), Aug-Dec (Season 2)', 
+        'key_stages': 'Planting → Weeding (2,5 weeks) → Harvest',
+        'critical_periods': 'Early weeding, harvest timing',
+        'tips': 'Harvest before heavy rains to prevent pod rot'
+    },
+    'groundnuts': {
+        'season': 'Feb-Mar, Aug-Sep planting',
+        'key_stages': 'Planting → Earthing-up → Harvest (90-110 days)',
+        'critical_periods': 'Rain-onset planting, pegging stage',
+        'tips': 'Must plant early in season for proper pod filling'
+    },
+    'sorghum': {
+        'season': 'Mar-Aug (single season in north)',
+        'key_stages': 'Planting → Weeding → Bird scaring → Harvest',
+        'critical_periods': 'Early weeding, grain filling (bird damage)',
+        'tips': 'Very drought tolerant, good for marginal areas'
+    },
+    'irish_potato': {
+        'season': 'Mar-Jul, Sep-Jan (highlands)',
+        'key_stages': 'Planting → Earthing-up → Harvest',
+        'critical_periods': 'Cool weather establishment, blight control',
+        'tips': 'Harvest before heavy rains, store in cool dry place'
+    }
+}
+
+# Bump after editing DISTRICTS, ALERT_RULES or CROP_GUIDANCE so _static is rebuilt
+TABLES_VERSION = 1
+
+@st.cache_resource(max_entries=1)
+def _static(version):
+    """Read-only lookup tables shared by all sessions, rebuilt when version changes"""
+    return {
+        'districts': DISTRICTS,
+        'rules': _build_rule_index(ALERT_RULES),
+        'guidance': CROP_GUIDANCE
     }
-    return guidance.get(crop, {})
 
 # MAIN APPLICATION
 def main():
+    static = _static(TABLES_VERSION)
+    districts = static['districts']
+    
     # Header
     st.markdown("""
     # 🌾 AgMCP Uganda
@@ -278,11 +407,11 @@ def main():
         # District selection
         district = st.selectbox(
             "Select District:",
-            list(DISTRICTS.keys()),
+            list(districts.keys()),
             help="Choose your district"
         )
         
-        district_info = DISTRICTS[district]
+        district_info = districts[district]
         
         # Show district info
         st.info(f"""
@@ -303,6 +432,7 @@ def main():
         # Refresh button
         if st.button("🔄 Refresh Data"):
             st.cache_data.clear()
+            _clear_forecast_cache()
             st.rerun()
     
     # Main content
@@ -312,14 +442,14 @@ def main():
         st.header(f"🎯 Advisory: {crop.title()} in {district}")
         
         # Get weather data
-        forecast = get_weather_forecast(district_info['lat'], district_info['lon'])
+        forecast = get_weather_forecast(district_info['forecast_url'])
         
         if forecast:
             weather_analysis = analyze_weather_conditions(forecast)
             current_date = datetime.now()
             
             # Check for alerts
-            alerts = check_alerts(district, crop, current_date, weather_analysis)
+            alerts = check_alerts(district, crop, current_date, weather_analysis, static['rules'])
             
             if alerts:
                 st.subheader("⚠️ Active Alerts")
@@ -349,15 +479,16 @@ def main():
             # Weather forecast table
             st.subheader("🌦️ 7-Day Weather Forecast")
             
-            df = pd.DataFrame(forecast)
-            df['Date'] = pd.to_datetime(df['date']).dt.strftime('%a %m/%d')
-            df['Rain (mm)'] = df['rainfall_mm'].round(1)
-            df['Max (°C)'] = df['temp_max'].round(1)
-            df['Min (°C)'] = df['temp_min'].round(1)
-            df['Humidity (%)'] = df['humidity'].round(0).astype(int)
+            table = {
+                'Date': [datetime.fromisoformat(d).strftime('%a %m/%d') for d in forecast['date']],
+                'Rain (mm)': forecast['rainfall_mm'].round(1),
+                'Max (°C)': forecast['temp_max'].round(1),
+                'Min (°C)': forecast['temp_min'].round(1),
+                'Humidity (%)': forecast['humidity'].round(0).astype(int)
+            }
             
             st.dataframe(
-                df[['Date', 'Rain (mm)', 'Max (°C)', 'Min (°C)', 'Humidity (%)']],
+                table,
                 use_container_width=True,
                 hide_index=True
             )
@@ -369,17 +500,13 @@ def main():
         
         if forecast:
             # Weather metrics
-            total_rain = sum(day['rainfall_mm'] for day in forecast)
-            avg_temp = sum(day['temp_max'] for day in forecast) / len(forecast)
-            rainy_days = len([d for d in forecast if d['rainfall_mm'] > 1])
-            
-            st.metric("7-Day Rain Total", f"{total_rain:.1f} mm")
-            st.metric("Avg Max Temp", f"{avg_temp:.1f}°C") 
-            st.metric("Rainy Days", f"{rainy_days} days")
+            st.metric("7-Day Rain Total", f"{weather_analysis['total_rain_7d']:.1f} mm")
+            st.metric("Avg Max Temp", f"{weather_analysis['avg_temp_7d']:.1f}°C") 
+            st.metric("Rainy Days", f"{weather_analysis['rainy_days_7d']} days")
         
         # Crop guidance
         st.subheader("🌱 Crop Info")
-        guidance = get_crop_guidance(crop, district)
+        guidance = static['guidance'].get(crop, {})
         
         if guidance:
             st.markdown(f"**Season:** {guidance['season']}")
@@ -401,6 +528,11 @@ def main():
         - NARO Extension Guidelines
         - Uganda Ministry of Agriculture
         """)
+    
+    # Prefetch the other districts once per session so switching is instant
+    if not st.session_state.get('prefetched'):
+        st.session_state.prefetched = True
+        prefetch_forecasts(info for name, info in districts.items() if name != district)
 
 if __name__ == "__main__":
     main()
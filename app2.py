@@ -1,9 +1,15 @@
 import streamlit as st
-import requests
+import asyncio
+import httpx
+import orjson
 import pandas as pd
+import numpy as np
+from collections import defaultdict
 from datetime import datetime, timedelta
-import folium
-from streamlit_folium import st_folium
+from pathlib import Path
+from string import Template
+from types import MappingProxyType
+import streamlit.components.v1 as components
 import plotly.express as px
 import plotly.graph_objects as go
 
@@ -16,7 +22,7 @@ st.set_page_config(
 )
 
 # DISTRICTS DATABASE (Enhanced with more details)
-DISTRICTS = {
+DISTRICTS = MappingProxyType({
     'Wakiso': {
         'region': 'Lake Victoria Crescent',
         'lat': 0.4040,
@@ -72,6 +78,40 @@ DISTRICTS = {
         'elevation': '1400m',
         'soil_type': 'Ferralsols'
     }
+})
+
+# Marker popup layout; $weather is filled in per render
+_POPUP_TPL = Template("""
+        <div style="font-family: Arial; width: 200px;">
+            <h4 style="color: #2E7D32; margin-bottom: 10px;">🏛️ $name</h4>
+            <b>Region:</b> $region<br>
+            <b>Population:</b> $population<br>
+            <b>Elevation:</b> $elevation<br>
+            <b>Rainfall:</b> $rainfall_pattern<br>
+            <b>Main Crops:</b> $crops_preview<br>
+            <b>Soil:</b> $soil_type
+            $weather
+        </div>
+        """)
+
+# Precompute derived strings once instead of on every map rebuild
+for district_name, info in DISTRICTS.items():
+    info['_key'] = district_name.lower()
+    info['_tooltip'] = f"Click for {district_name} details"
+    info['_tpl_vars'] = {
+        'name': district_name,
+        'region': info['region'],
+        'population': info['population'],
+        'elevation': info['elevation'],
+        'rainfall_pattern': info['rainfall_pattern'],
+        'crops_preview': ', '.join(info['main_crops'][:2]),
+        'soil_type': info['soil_type']
+    }
+
+# Marker coordinates back to district names for map click handling
+DISTRICT_BY_COORD = {
+    (round(info['lat'], 4), round(info['lon'], 4)): name
+    for name, info in DISTRICTS.items()
 }
 
 # ALERT RULES (same as before)
@@ -135,133 +175,137 @@ ALERT_RULES = [
     }
 ]
 
+# Index rules by (crop, district) and pre-parse their MM-DD windows once
+ALERT_INDEX = defaultdict(list)
+for rule in ALERT_RULES:
+    rule['_start_mmdd'] = int(rule['start_date'].replace('-', ''))
+    rule['_end_mmdd'] = int(rule['end_date'].replace('-', ''))
+    ALERT_INDEX[(rule['crop'], rule['district'])].append(rule)
+
 # MARKET PRICES (Mock data for demonstration)
-MARKET_PRICES = {
+MARKET_PRICES = MappingProxyType({
     'maize': {'price_ugx': 2500, 'trend': '↗️', 'change': '+5%'},
     'beans': {'price_ugx': 4200, 'trend': '↘️', 'change': '-2%'},
     'groundnuts': {'price_ugx': 6800, 'trend': '↗️', 'change': '+8%'},
     'sorghum': {'price_ugx': 2200, 'trend': '→', 'change': '0%'},
     'irish_potato': {'price_ugx': 3500, 'trend': '↗️', 'change': '+12%'}
-}
+})
 
 # MAP FUNCTIONS
-def create_uganda_map(selected_district=None, weather_data=None):
-    """Create interactive map of Uganda with district markers"""
-    
-    # Center map on Uganda
-    m = folium.Map(
-        location=[1.3733, 32.2903], 
-        zoom_start=7,
-        tiles='OpenStreetMap'
-    )
-    
-    # Add custom CSS styling
-    folium.plugins.Fullscreen().add_to(m)
-    
-    # Add district markers
-    for district_name, info in DISTRICTS.items():
-        # Get weather for this district if available
-        district_weather = ""
-        if weather_data and district_name.lower() in weather_data:
-            weather = weather_data[district_name.lower()]
-            district_weather = f"""
+# Lightweight Leaflet map that reports marker clicks back to the app
+leaflet_map = components.declare_component(
+    'leaflet_map',
+    path=str(Path(__file__).parent / 'leaflet_map')
+)
+
+def _popup_html(info, weather=None):
+    """Popup content for a district marker"""
+    district_weather = ""
+    if weather:
+        district_weather = f"""
             <br><b>Weather Today:</b>
             <br>🌧️ Rain: {weather.get('rainfall', 0):.1f}mm
-            <br>🌡️ Temp: {weather.get('temp_max', 'N/A')}°C
-            <br>💧 Humidity: {weather.get('humidity', 'N/A')}%
+            <br>🌡️ Temp: {weather['temp_max']:.1f}°C
+            <br>💧 Humidity: {weather['humidity']:.0f}%
             """
-        
-        # Create popup content
-        popup_content = f"""
-        <div style="font-family: Arial; width: 200px;">
-            <h4 style="color: #2E7D32; margin-bottom: 10px;">🏛️ {district_name}</h4>
-            <b>Region:</b> {info['region']}<br>
-            <b>Population:</b> {info['population']}<br>
-            <b>Elevation:</b> {info['elevation']}<br>
-            <b>Rainfall:</b> {info['rainfall_pattern']}<br>
-            <b>Main Crops:</b> {', '.join(info['main_crops'][:2])}<br>
-            <b>Soil:</b> {info['soil_type']}
-            {district_weather}
-        </div>
-        """
-        
-        # Choose marker color based on selection and alerts
-        if district_name == selected_district:
-            icon_color = 'red'
-            icon_symbol = 'star'
-        else:
-            icon_color = 'green'
-            icon_symbol = 'leaf'
-        
-        # Add marker
-        folium.Marker(
-            location=[info['lat'], info['lon']],
-            popup=folium.Popup(popup_content, max_width=250),
-            tooltip=f"Click for {district_name} details",
-            icon=folium.Icon(
-                color=icon_color, 
-                icon=icon_symbol,
-                prefix='fa'
-            )
-        ).add_to(m)
-    
-    # Add title
-    title_html = '''
-    <h3 align="center" style="font-size:20px; color: #2E7D32;">
-        <b>🌾 Uganda Agricultural Districts</b>
-    </h3>
-    '''
-    m.get_root().html.add_child(folium.Element(title_html))
-    
-    return m
+    return _POPUP_TPL.substitute(info['_tpl_vars'], weather=district_weather)
+
+def _weather_key(weather_data):
+    """Hashable snapshot of per-district map weather"""
+    return tuple(
+        (name, round(w['rainfall'], 1), w['temp_max'], w['humidity'])
+        for name, w in sorted(weather_data.items())
+    )
+
+@st.cache_data(ttl=3600)
+def get_map_markers(selected_district, weather_key):
+    """Marker data for the Leaflet map, built once per selection and weather snapshot"""
+    weather_data = {
+        name: {'rainfall': rainfall, 'temp_max': temp_max, 'humidity': humidity}
+        for name, rainfall, temp_max, humidity in weather_key
+    }
+    return [
+        {
+            'name': district_name,
+            'lat': info['lat'],
+            'lon': info['lon'],
+            'popup_html': _popup_html(info, weather_data.get(info['_key'])),
+            'tooltip': info['_tooltip'],
+            'selected': district_name == selected_district
+        }
+        for district_name, info in DISTRICTS.items()
+    ]
 
 def create_weather_trend_chart(forecast_data, district_name):
     """Create weather trend visualization"""
-    if not forecast_data:
+    if forecast_data['date'].size == 0:
         return None
     
-    df = pd.DataFrame(forecast_data)
-    df['date'] = pd.to_datetime(df['date'])
-    df['day'] = df['date'].dt.strftime('%a %m/%d')
-    
-    # Create subplot with rainfall and temperature
-    fig = go.Figure()
+    days = forecast_data['day']
     
-    # Add rainfall bars
-    fig.add_trace(go.Bar(
-        x=df['day'],
-        y=df['rainfall_mm'],
-        name='Rainfall (mm)',
-        marker_color='lightblue',
-        yaxis='y'
-    ))
-    
-    # Add temperature line
-    fig.add_trace(go.Scatter(
-        x=df['day'],
-        y=df['temp_max'],
-        mode='lines+markers',
-        name='Max Temp (°C)',
-        line=dict(color='red', width=3),
-        yaxis='y2'
-    ))
-    
-    # Update layout
-    fig.update_layout(
-        title=f'Weather Forecast - {district_name}',
-        xaxis_title='Date',
-        yaxis=dict(title='Rainfall (mm)', side='left'),
-        yaxis2=dict(title='Temperature (°C)', side='right', overlaying='y'),
-        hovermode='x unified',
-        height=400
+    # Build traces and layout in one constructor so the figure is validated once
+    fig = go.Figure(
+        data=[
+            # Rainfall bars
+            go.Bar(
+                x=days,
+                y=forecast_data['rainfall_mm'],
+                name='Rainfall (mm)',
+                marker_color='lightblue',
+                yaxis='y'
+            ),
+            # Temperature line
+            go.Scatter(
+                x=days,
+                y=forecast_data['temp_max'],
+                mode='lines+markers',
+                name='Max Temp (°C)',
+                line=dict(color='red', width=3),
+                yaxis='y2'
+            )
+        ],
+        layout=go.Layout(
+            title=f'Weather Forecast - {district_name}',
+            xaxis=dict(title='Date'),
+            yaxis=dict(title='Rainfall (mm)', side='left'),
+            yaxis2=dict(title='Temperature (°C)', side='right', overlaying='y'),
+            hovermode='x unified',
+            height=400
+        )
     )
     
     return fig
 
 # WEATHER FUNCTIONS (same as before)
-@st.cache_data(ttl=3600)
-def get_weather_forecast(lat, lon, days=7):
-    """Fetch weather forecast from Open-Meteo API"""
+# Returned when a fetch fails; callers check for zero-length arrays
+_EMPTY_FORECAST = {
+    'date': np.empty(0, dtype='datetime64[D]'),
+    'day': np.empty(0, dtype=str),
+    'rainfall_mm': np.empty(0, dtype=float),
+    'temp_max': np.empty(0, dtype=float),
+    'temp_min': np.empty(0, dtype=float),
+    'humidity': np.empty(0, dtype=float)
+}
+
+def _parse_forecast(data):
+    """Convert an Open-Meteo JSON response into forecast arrays"""
+    # Columns as NumPy arrays so aggregates are single vectorized calls
+    daily = data['daily']
+    dates = np.asarray(daily['time'], dtype='datetime64[D]')
+    forecast = {
+        'date': dates,
+        # Display labels shared by the trend chart and the forecast table
+        'day': np.array([d.item().strftime('%a %m/%d') for d in dates], dtype=str),
+        'rainfall_mm': np.nan_to_num(np.asarray(daily['precipitation_sum'], dtype=float)),
+        'temp_max': np.asarray(daily['temperature_2m_max'], dtype=float),
+        'temp_min': np.asarray(daily['temperature_2m_min'], dtype=float),
+        'humidity': np.nan_to_num(np.asarray(daily['relative_humidity_2m_mean'], dtype=float))
+    }
+    
+    return forecast
+
+async def _fetch_one(client, lat, lon, days):
+    """Request and parse a forecast from Open-Meteo, raising on failure"""
     url = "https://api.open-meteo.com/v1/forecast"
     params = {
         'latitude': lat,
@@ -271,38 +315,55 @@ def get_weather_forecast(lat, lon, days=7):
         'forecast_days': days
     }
     
-    try:
-        response = requests.get(url, params=params, timeout=10)
-        response.raise_for_status()
-        data = response.json()
-        
-        forecast = []
-        daily = data['daily']
-        for i in range(len(daily['time'])):
-            forecast.append({
-                'date': daily['time'][i],
-                'rainfall_mm': daily['precipitation_sum'][i] or 0,
-                'temp_max': daily['temperature_2m_max'][i],
-                'temp_min': daily['temperature_2m_min'][i],
-                'humidity': daily['relative_humidity_2m_mean'][i] or 0
-            })
-        
-        return forecast
-    except Exception as e:
-        st.error(f"Unable to fetch weather data: {str(e)}")
-        return []
+    response = await client.get(url, params=params)
+    response.raise_for_status()
+    return _parse_forecast(orjson.loads(response.content))
+
+async def _fetch_all(coords, days):
+    """Fetch all forecasts concurrently over one multiplexed HTTP/2 connection"""
+    limits = httpx.Limits(max_keepalive_connections=8)
+    async with httpx.AsyncClient(http2=True, timeout=10, limits=limits) as client:
+        return await asyncio.gather(
+            *(_fetch_one(client, lat, lon, days) for lat, lon in coords),
+            return_exceptions=True
+        )
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def get_weather_forecasts_bulk(coords, days=7):
+    """Fetch forecasts for several (lat, lon) pairs concurrently"""
+    forecasts = []
+    for result in asyncio.run(_fetch_all(coords, days)):
+        if isinstance(result, Exception):
+            st.error(f"Unable to fetch weather data: {str(result)}")
+            forecasts.append(_EMPTY_FORECAST)
+        else:
+            forecasts.append(result)
+    
+    return forecasts
+
+@st.cache_data(ttl=3600)
+def build_forecast_table(forecast):
+    """Build the display table for a forecast in a single DataFrame construction"""
+    return pd.DataFrame({
+        'Date': forecast['day'],
+        'Rain (mm)': np.round(forecast['rainfall_mm'], 1),
+        'Max (°C)': np.round(forecast['temp_max'], 1),
+        'Min (°C)': np.round(forecast['temp_min'], 1),
+        'Humidity (%)': np.round(forecast['humidity']).astype(np.int16)
+    })
 
 def analyze_weather_conditions(forecast):
     """Analyze weather for alert triggers"""
-    if not forecast:
+    if forecast['date'].size == 0:
         return {}
     
+    rain = forecast['rainfall_mm']
     analysis = {
-        'next_24h_rain': forecast[0]['rainfall_mm'],
-        'next_72h_rain': sum(day['rainfall_mm'] for day in forecast[:3]),
-        'avg_humidity': sum(day['humidity'] for day in forecast[:3]) / 3,
-        'avg_temp': sum(day['temp_max'] for day in forecast[:3]) / 3,
-        'rainy_days_ahead': len([d for d in forecast[:7] if d['rainfall_mm'] > 1])
+        'next_24h_rain': float(rain[0]),
+        'next_72h_rain': float(rain[:3].sum()),
+        'avg_humidity': float(forecast['humidity'][:3].mean()),
+        'avg_temp': float(forecast['temp_max'][:3].mean()),
+        'rainy_days_ahead': int((rain[:7] > 1).sum())
     }
     
     return analysis
@@ -311,15 +372,11 @@ def analyze_weather_conditions(forecast):
 def check_alerts(district, crop, current_date, weather_analysis):
     """Check for active alerts based on crop calendar and weather"""
     active_alerts = []
-    current_date_str = current_date.strftime('%m-%d')
+    today_mmdd = current_date.month * 100 + current_date.day
+    candidates = ALERT_INDEX.get((crop, district.lower()), []) + ALERT_INDEX.get((crop, 'all'), [])
     
-    for rule in ALERT_RULES:
-        if rule['district'] != 'all' and rule['district'] != district.lower():
-            continue
-        if rule['crop'] != crop:
-            continue
-        
-        if rule['start_date'] <= current_date_str <= rule['end_date']:
+    for rule in candidates:
+        if rule['_start_mmdd'] <= today_mmdd <= rule['_end_mmdd']:
             weather_triggered = check_weather_trigger(rule['weather_conditions'], weather_analysis)
             
             if weather_triggered:
@@ -349,56 +406,56 @@ def check_weather_trigger(conditions, analysis):
     
     return triggers
 
+_SEVERITY_MAP = MappingProxyType({
+    'critical': {'icon': '🔴', 'level': 'CRITICAL', 'color': 'red'},
+    'high': {'icon': '🟡', 'level': 'HIGH', 'color': 'orange'},
+    'medium': {'icon': '🟢', 'level': 'ADVISORY', 'color': 'green'},
+    'low': {'icon': '🔵', 'level': 'INFO', 'color': 'blue'}
+})
+
 def get_alert_severity(priority):
     """Map priority to display severity"""
-    severity_map = {
-        'critical': {'icon': '🔴', 'level': 'CRITICAL', 'color': 'red'},
-        'high': {'icon': '🟡', 'level': 'HIGH', 'color': 'orange'},
-        'medium': {'icon': '🟢', 'level': 'ADVISORY', 'color': 'green'},
-        'low': {'icon': '🔵', 'level': 'INFO', 'color': 'blue'}
+    return _SEVERITY_MAP.get(priority, _SEVERITY_MAP['low'])
+
+_CROP_GUIDANCE = MappingProxyType({
+    'maize': {
+        'season': 'Mar-Jul (Season 1), Aug-Dec (Season 2)',
+        'key_stages': 'Planting → Top-dress (4-6 weeks) → Harvest',
+        'critical_periods': 'Fertilizer application, Fall Armyworm scouting',
+        'tips': 'Plant at rain onset for nitrogen flush benefit'
+    },
+    'beans': {
+        'season': 'Mar-Jul (Season 1), Aug-Dec (Season 2)', 
+        'key_stages': 'Planting → Weeding (2,5 weeks) → Harvest',
+        'critical_periods': 'Early weeding, harvest timing',
+        'tips': 'Harvest before heavy rains to prevent pod rot'
+    },
+    'groundnuts': {
+        'season': 'Feb-Mar, Aug-Sep planting',
+        'key_stages': 'Planting → Earthing-up → Harvest (90-110 days)',
+        'critical_periods': 'Rain-onset planting, pegging stage',
+        'tips': 'Must plant early in season for proper pod filling'
+    },
+    'sorghum': {
+        'season': 'Mar-Aug (single season in north)',
+        'key_stages': 'Planting → Weeding → Bird scaring → Harvest',
+        'critical_periods': 'Early weeding, grain filling (bird damage)',
+        'tips': 'Very drought tolerant, good for marginal areas'
+    },
+    'irish_potato': {
+        'season': 'Mar-Jul, Sep-Jan (highlands)',
+        'key_stages': 'Planting → Earthing-up → Harvest',
+        'critical_periods': 'Cool weather establishment, blight control',
+        'tips': 'Harvest before heavy rains, store in cool dry place'
     }
-    return severity_map.get(priority, severity_map['low'])
+})
 
 def get_crop_guidance(crop, district):
     """Get general crop guidance"""
-    guidance = {
-        'maize': {
-            'season': 'Mar-Jul (Season 1), Aug-Dec (Season 2)',
-            'key_stages': 'Planting → Top-dress (4-6 weeks) → Harvest',
-            'critical_periods': 'Fertilizer application, Fall Armyworm scouting',
-            'tips': 'Plant at rain onset for nitrogen flush benefit'
-        },
-        'beans': {
-            'season': 'Mar-Jul (Season 1), Aug-Dec (Season 2)', 
-            'key_stages': 'Planting → Weeding (2,5 weeks) → Harvest',
-            'critical_periods': 'Early weeding, harvest timing',
-            'tips': 'Harvest before heavy rains to prevent pod rot'
-        },
-        'groundnuts': {
-            'season': 'Feb-Mar, Aug-Sep planting',
-            'key_stages': 'Planting → Earthing-up → Harvest (90-110 days)',
-            'critical_periods': 'Rain-onset planting, pegging stage',
-            'tips': 'Must plant early in season for proper pod filling'
-        },
-        'sorghum': {
-            'season': 'Mar-Aug (single season in north)',
-            'key_stages': 'Planting → Weeding → Bird scaring → Harvest',
-            'critical_periods': 'Early weeding, grain filling (bird damage)',
-            'tips': 'Very drought tolerant, good for marginal areas'
-        },
-        'irish_potato': {
-            'season': 'Mar-Jul, Sep-Jan (highlands)',
-            'key_stages': 'Planting → Earthing-up → Harvest',
-            'critical_periods': 'Cool weather establishment, blight control',
-            'tips': 'Harvest before heavy rains, store in cool dry place'
-        }
-    }
-    return guidance.get(crop, {})
+    return _CROP_GUIDANCE.get(crop, {})
 
-# MAIN APPLICATION
-def main():
-    # Custom CSS for styling
-    st.markdown("""
+# PAGE CHROME (static HTML, built once at import)
+_CSS_BLOCK = """
     <style>
     .main-header {
         background: linear-gradient(90deg, #4CAF50, #2E7D32);
@@ -422,15 +479,27 @@ def main():
         margin-bottom: 10px;
     }
     </style>
-    """, unsafe_allow_html=True)
-    
-    # Header
-    st.markdown("""
+    """
+
+_HEADER_HTML = """
     <div class="main-header">
         <h1 style="color: white; margin-bottom: 10px;">🌾 AgMCP Uganda Dashboard</h1>
         <p style="color: white; margin: 0;">Real-time Agricultural Intelligence & Climate Prediction</p>
     </div>
-    """, unsafe_allow_html=True)
+    """
+
+_FOOTER_HTML = """
+    <div style="text-align: center; color: #666; padding: 20px;">
+        <p><b>AgMCP Uganda v0.2</b> - Powered by Open-Meteo Weather API • NARO Agricultural Guidelines • Uganda Ministry of Agriculture</p>
+        <p>🌾 Empowering farmers with real-time agricultural intelligence</p>
+    </div>
+    """
+
+# MAIN APPLICATION
+def main():
+    # Custom CSS for styling and header
+    st.markdown(_CSS_BLOCK, unsafe_allow_html=True)
+    st.markdown(_HEADER_HTML, unsafe_allow_html=True)
     
     # Initialize session state for district selection
     if 'selected_district' not in st.session_state:
@@ -442,50 +511,48 @@ def main():
     with map_col:
         st.subheader("🗺️ Interactive Uganda Agricultural Map")
         
-        # Get weather data for map markers
+        # Fetch every district's 7-day forecast in one concurrent batch; the
+        # map previews today's values and the detail view reuses the rest
+        # Rounded so near-identical coordinates share a cache entry
+        coords = tuple((round(info['lat'], 3), round(info['lon'], 3)) for info in DISTRICTS.values())
+        forecasts = dict(zip(DISTRICTS, get_weather_forecasts_bulk(coords)))
+        
         weather_for_map = {}
         for district_name, info in DISTRICTS.items():
-            forecast = get_weather_forecast(info['lat'], info['lon'], 1)
-            if forecast:
-                weather_for_map[district_name.lower()] = {
-                    'rainfall': forecast[0]['rainfall_mm'],
-                    'temp_max': forecast[0]['temp_max'],
-                    'humidity': forecast[0]['humidity']
+            forecast = forecasts[district_name]
+            if forecast['date'].size:
+                weather_for_map[info['_key']] = {
+                    'rainfall': float(forecast['rainfall_mm'][0]),
+                    'temp_max': float(forecast['temp_max'][0]),
+                    'humidity': float(forecast['humidity'][0])
                 }
         
-        # Create and display map
-        uganda_map = create_uganda_map(
-            selected_district=st.session_state.selected_district,
-            weather_data=weather_for_map
-        )
-        
-        map_data = st_folium(uganda_map, width=700, height=400)
+        # Marker data only changes with the selection or the weather
+        markers = get_map_markers(st.session_state.selected_district, _weather_key(weather_for_map))
+        clicked = leaflet_map(markers=markers, key='uganda_map', default=None)
         
-        # Handle map clicks
-        if map_data['last_object_clicked_popup']:
-            clicked_popup = map_data['last_object_clicked_popup']
-            # Extract district name from popup content
-            for district_name in DISTRICTS.keys():
-                if district_name in str(clicked_popup):
-                    st.session_state.selected_district = district_name
-                    st.rerun()
+        # Handle map clicks; the component keeps returning its last click on
+        # later reruns, so only act on a click we haven't seen yet
+        st.session_state.setdefault('_last_click_sig', None)
+        if clicked and clicked != st.session_state._last_click_sig:
+            st.session_state._last_click_sig = clicked
+            clicked_name = DISTRICT_BY_COORD.get((round(clicked['lat'], 4), round(clicked['lng'], 4)))
+            if clicked_name and clicked_name != st.session_state.selected_district:
+                st.session_state.selected_district = clicked_name
+                st.rerun()
     
     with sidebar_col:
         st.header("📍 Farm Details")
         
-        # District selection dropdown (synced with map)
+        # District selection dropdown (synced with map); the widget writes the
+        # selection straight into session state, so no extra rerun is needed
         district = st.selectbox(
             "Select District:",
             list(DISTRICTS.keys()),
-            index=list(DISTRICTS.keys()).index(st.session_state.selected_district),
+            key='selected_district',
             help="Choose your district or click on the map"
         )
         
-        # Update session state if dropdown changes
-        if district != st.session_state.selected_district:
-            st.session_state.selected_district = district
-            st.rerun()
-        
         district_info = DISTRICTS[district]
         
         # District info card
@@ -530,9 +597,9 @@ def main():
     st.markdown("---")
     
     # Get weather data for selected district
-    forecast = get_weather_forecast(district_info['lat'], district_info['lon'])
+    forecast = forecasts[district]
     
-    if forecast:
+    if forecast['date'].size:
         # Create two columns for main content
         alert_col, chart_col = st.columns([1, 1])
         
@@ -574,10 +641,10 @@ def main():
         # Weather summary metrics
         st.subheader("🌦️ Weather Summary")
         
-        total_rain = sum(day['rainfall_mm'] for day in forecast)
-        avg_temp = sum(day['temp_max'] for day in forecast) / len(forecast)
-        rainy_days = len([d for d in forecast if d['rainfall_mm'] > 1])
-        max_temp_day = max(forecast, key=lambda x: x['temp_max'])
+        total_rain = float(forecast['rainfall_mm'].sum())
+        avg_temp = float(forecast['temp_max'].mean())
+        rainy_days = int((forecast['rainfall_mm'] > 1).sum())
+        max_temp = float(forecast['temp_max'].max())
         
         metric_col1, metric_col2, metric_col3, metric_col4 = st.columns(4)
         
@@ -588,20 +655,13 @@ def main():
         with metric_col3:
             st.metric("Rainy Days", f"{rainy_days} days")
         with metric_col4:
-            st.metric("Hottest Day", f"{max_temp_day['temp_max']:.1f}°C")
+            st.metric("Hottest Day", f"{max_temp:.1f}°C")
         
         # Detailed weather table
         st.subheader("📊 Detailed 7-Day Forecast")
         
-        df = pd.DataFrame(forecast)
-        df['Date'] = pd.to_datetime(df['date']).dt.strftime('%a %m/%d')
-        df['Rain (mm)'] = df['rainfall_mm'].round(1)
-        df['Max (°C)'] = df['temp_max'].round(1)
-        df['Min (°C)'] = df['temp_min'].round(1)
-        df['Humidity (%)'] = df['humidity'].round(0).astype(int)
-        
         st.dataframe(
-            df[['Date', 'Rain (mm)', 'Max (°C)', 'Min (°C)', 'Humidity (%)']],
+            build_forecast_table(forecast),
             use_container_width=True,
             hide_index=True
         )
@@ -626,12 +686,7 @@ def main():
     
     # Footer
     st.markdown("---")
-    st.markdown("""
-    <div style="text-align: center; color: #666; padding: 20px;">
-        <p><b>AgMCP Uganda v0.2</b> - Powered by Open-Meteo Weather API • NARO Agricultural Guidelines • Uganda Ministry of Agriculture</p>
-        <p>🌾 Empowering farmers with real-time agricultural intelligence</p>
-    </div>
-    """, unsafe_allow_html=True)
+    st.markdown(_FOOTER_HTML, unsafe_allow_html=True)
 
 if __name__ == "__main__":
     main()